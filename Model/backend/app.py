@@ -1,85 +1,154 @@
 # backend/app.py
-from flask import Flask, request, jsonify
-from flask_cors import CORS
+from quart import Quart, Response, request, jsonify
+from quart_cors import cors
+import asyncio
 import io
 import base64
-import docx
+import zipfile
+from lxml import etree
 import torch # Still needed for tensor operations, but won't use CUDA
-from transformers import AutoModelForCausalLM, AutoTokenizer
+from transformers import (
+    AutoModelForCausalLM,
+    AutoTokenizer,
+    StoppingCriteria,
+    StoppingCriteriaList,
+    TextIteratorStreamer,
+)
 import os
 import re
+import hashlib
+import copy
+import json
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from report_stops import find_stop_index, streamable_length, trim_at_stop_strings
 
-# --- Flask App Setup ---
-app = Flask(__name__)
+# Intel Extension for Transformers is optional: when installed, the model is loaded with
+# INT4 weight-only quantization so each decode step reads ~8x less weight data.
+try:
+    import intel_extension_for_transformers
+    from intel_extension_for_transformers.transformers import (
+        AutoModelForCausalLM as INT4AutoModelForCausalLM,
+    )
+    from packaging.version import Version
+    # Compare the release tuple so pre-releases like "1.4rc1" count as 1.4
+    ITREX_VERSION = Version(intel_extension_for_transformers.__version__).release
+    # By default ITREX sends CPU INT4 loads to its own graph runtime (Neural Speed, formerly
+    # the "LLM runtime"), which doesn't return a torch nn.Module. 1.4 renamed the flag that
+    # turns it off and replaced WeightOnlyQuantConfig with per-algorithm configs (RtnConfig).
+    if ITREX_VERSION >= (1, 4):
+        from intel_extension_for_transformers.transformers import RtnConfig as INT4QuantConfig
+        ITREX_RUNTIME_FLAG = "use_neural_speed"
+    else:
+        from intel_extension_for_transformers.transformers import WeightOnlyQuantConfig as INT4QuantConfig
+        ITREX_RUNTIME_FLAG = "use_llm_runtime"
+    ITREX_AVAILABLE = True
+except ImportError:
+    ITREX_AVAILABLE = False
+except ValueError as e:
+    # Includes packaging's InvalidVersion for an unparseable version string
+    print(f"Warning: unsupported intel-extension-for-transformers version, INT4 loading disabled: {e}")
+    ITREX_AVAILABLE = False
+
+# llama-cpp-python is optional: when installed and a GGUF file is present, generation runs
+# on llama.cpp's hand-tuned CPU kernels instead of the transformers model.
+try:
+    from llama_cpp import Llama, llama_set_n_threads
+    LLAMA_CPP_AVAILABLE = True
+except ImportError:
+    LLAMA_CPP_AVAILABLE = False
+
+# Intel Extension for PyTorch is optional: on CPUs with AMX it rewrites the Llama modules
+# to run BF16 matmuls on the AMX tile units.
+try:
+    import intel_extension_for_pytorch as ipex
+    IPEX_AVAILABLE = True
+except ImportError:
+    IPEX_AVAILABLE = False
+
+# --- Quart App Setup ---
+# Async app: DOCX parsing for new requests runs on the event loop while the model generates
+app = Quart(__name__)
 # Enable CORS for communication with your frontend (adjust origins in production)
-CORS(app, resources={r"/*": {"origins": "*"}}) 
+app = cors(app, allow_origin="*")
+
+# Single generation worker: one model.generate already saturates every core, so requests
+# queue here instead of competing for the CPU. Torch releases the GIL while it computes,
+# so the event loop keeps serving in the meantime.
+generation_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llama-generate")
 
 # --- LLaMA 3.1 Model Configuration ---
 LLAMA_MODEL_ID = "meta-llama/Meta-Llama-3.1-8B-Instruct"
+# Q4_K_M GGUF export of the same model, used by the llama.cpp backend when the file exists
+LLAMA_GGUF_PATH = os.environ.get("LLAMA_GGUF_PATH", "Meta-Llama-3.1-8B-Instruct.Q4_K_M.gguf")
+# Optional small draft model for speculative decoding. It must share the Llama 3 tokenizer
+# (e.g. "meta-llama/Llama-3.2-1B-Instruct"); otherwise prompt-lookup decoding is used instead.
+LLAMA_DRAFT_MODEL_ID = os.environ.get("LLAMA_DRAFT_MODEL_ID")
+# Set by gunicorn_conf.py when the app is preloaded in gunicorn's master. The master then only
+# loads the weights and each forked worker calls prepare_model() (see App Initialization).
+PRELOAD_FOR_FORK = os.environ.get("FAIRHIRE_PRELOAD_FOR_FORK") == "1"
 
 # --- Global Variables for Model ---
 tokenizer = None
 model = None
+draft_model = None # Speculative decoding draft, None when prompt-lookup decoding is used
+llm = None # llama.cpp model, set instead of tokenizer/model when the GGUF backend is used
 model_loaded = False
+# Precision of the loaded weights ("fp32", "int4", ...), used for logging and to pick optimizations
+model_precision = "fp32"
 # Define the device explicitly as CPU
 DEVICE = "cpu"
 
-def load_llama_model():
+# --- Prompt ---
+# Placeholder substituted for the resume when pre-tokenizing the constant prompt template
+RESUME_PLACEHOLDER = "<<RESUME_TEXT>>"
+# Token IDs of the constant chat prompt before the resume, and the text that follows it,
+# computed once in load_llama_model so each request only tokenizes the resume
+prompt_prefix_ids = None
+prompt_resume_lead = ""
+prompt_suffix_text = ""
+# KV cache of prompt_prefix_ids, prefilled once so requests only prefill the resume part
+prompt_prefix_cache = None
+
+# Reports rarely need the full budget; generation also stops early once the model starts
+# appending a new section after the report (see report_stops.py)
+REPORT_MAX_NEW_TOKENS = 400
+
+class StopOnSubstring(StoppingCriteria):
     """
-    Loads the LLaMA 3.1 model and tokenizer for CPU inference.
-    This function will be called once when the Flask app starts.
-    Requires HUGGING_FACE_HUB_TOKEN environment variable to be set.
+    Stops generation once the generated text reaches a stop marker after the Skills
+    section (see report_stops.find_stop_index). The prompt is never decoded.
     """
-    global tokenizer, model, model_loaded
-    if model_loaded:
-        print("Model already loaded.")
-        return
 
-    print(f"Loading LLaMA 3.1 model for CPU: {LLAMA_MODEL_ID}...")
-    try:
-        # Check for Hugging Face token
-        hf_token = os.environ.get("HUGGING_FACE_HUB_TOKEN")
-        if not hf_token:
-            raise ValueError("HUGGING_FACE_HUB_TOKEN environment variable not set. Please set it.")
-
-        tokenizer = AutoTokenizer.from_pretrained(LLAMA_MODEL_ID, token=hf_token)
-        model = AutoModelForCausalLM.from_pretrained(
-            LLAMA_MODEL_ID,
-            # No torch_dtype=torch.bfloat16 or device_map="auto" for CPU
-            low_cpu_mem_usage=True, # Still useful for reducing CPU RAM during loading
-            token=hf_token
-        ).to(DEVICE) # Explicitly move model to CPU after loading
+    def __init__(self, tokenizer, prompt_length):
+        self.tokenizer = tokenizer
+        self.prompt_length = prompt_length
 
-        model.eval() # Set model to evaluation mode
-        model_loaded = True
-        print(f"LLaMA 3.1 model loaded successfully on {DEVICE}.")
-    except Exception as e:
-        print(f"Error loading LLaMA model: {e}")
-        # Exit or raise error, as the app won't function without the model
-        exit(1)
+    def __call__(self, input_ids, scores, **kwargs):
+        # Decoding the whole (<= 400 token) report each step is negligible next to a forward
+        # pass, and unlike a fixed lookback window it always sees the Skills heading
+        report = self.tokenizer.decode(input_ids[0, self.prompt_length:], skip_special_tokens=True)
+        done = find_stop_index(report) != -1
+        return torch.full((input_ids.shape[0],), done, dtype=torch.bool, device=input_ids.device)
 
-def read_docx_from_bytes(docx_bytes):
+class StopOnEvent(StoppingCriteria):
     """
-    Reads text from a .docx file provided as bytes.
+    Stops generation once event is set, e.g. when the client has disconnected.
     """
-    try:
-        doc = docx.Document(io.BytesIO(docx_bytes))
-        full_text = []
-        for para in doc.paragraphs:
-            full_text.append(para.text)
-        return "\n".join(full_text)
-    except Exception as e:
-        print(f"Error reading DOCX: {e}")
-        raise ValueError("Could not read DOCX file.")
 
-def generate_llama_report(resume_text):
+    def __init__(self, event):
+        self.event = event
+
+    def __call__(self, input_ids, scores, **kwargs):
+        return torch.full((input_ids.shape[0],), self.event.is_set(), dtype=torch.bool, device=input_ids.device)
+
+def build_messages(resume_text):
     """
-    Generates a bias-free HR report using the loaded LLaMA 3.1 model.
+    Builds the chat messages asking the model for a bias-free report of resume_text.
     """
-    if not model_loaded:
-        raise RuntimeError("LLaMA model not loaded.")
-
-    messages = [
+    return [
         {"role": "system", "content": "You are an expert HR AI assistant specializing in bias-free resume screening. Your task is to extract and summarize ONLY objective, professional information from resumes: qualifications, experience, and skills. It is IMPERATIVE that you COMPLETELY OMIT any and all personal or demographic details that could introduce bias. Maintain a strictly professional, neutral, and concise tone. Your output should be a clear, structured report."},
         {"role": "user", "content": f"""
         Analyze the following resume content and provide a summary for HR review.
@@ -110,41 +179,534 @@ def generate_llama_report(resume_text):
         """}
     ]
 
+def tokenize_prompt_template():
+    """
+    Renders the chat template around RESUME_PLACEHOLDER and pre-tokenizes the constant
+    part before the resume, so requests skip re-tokenizing the ~400-token instructions.
+    """
+    global prompt_prefix_ids, prompt_resume_lead, prompt_suffix_text
+    prompt_text = tokenizer.apply_chat_template(
+        build_messages(RESUME_PLACEHOLDER),
+        tokenize=False,
+        add_generation_prompt=True
+    )
+    prefix_text, prompt_suffix_text = prompt_text.split(RESUME_PLACEHOLDER)
+    # End the prefix on its last newline and tokenize the indentation with the resume, so
+    # the split doesn't change how the text around the boundary is tokenized
+    stripped_prefix = prefix_text.rstrip(" ")
+    prompt_resume_lead = prefix_text[len(stripped_prefix):]
+    # The rendered template already starts with <|begin_of_text|>
+    prompt_prefix_ids = tokenizer(
+        stripped_prefix, add_special_tokens=False, return_tensors="pt"
+    ).input_ids.to(DEVICE)
+
+def prefill_prompt_prefix():
+    """
+    Runs the constant prompt prefix through the model once and keeps its KV cache, so
+    each request skips prefilling the ~400 instruction tokens.
+    Leaves prompt_prefix_cache as None (full prefill per request) if this fails.
+    """
+    global prompt_prefix_cache
+    try:
+        with torch.inference_mode():
+            outputs = model(prompt_prefix_ids, use_cache=True)
+        prompt_prefix_cache = outputs.past_key_values
+    except Exception as e:
+        print(f"Warning: could not prefill prompt prefix cache: {e}")
+
+def build_input_ids(resume_text):
+    """
+    Returns the full prompt token IDs for resume_text: the cached prefix followed by the
+    tokenized resume and closing instructions.
+    """
+    request_ids = tokenizer(
+        prompt_resume_lead + resume_text + prompt_suffix_text,
+        add_special_tokens=False,
+        return_tensors="pt"
+    ).input_ids.to(DEVICE)
+    return torch.cat([prompt_prefix_ids, request_ids], dim=1)
+
+# --- Report Cache ---
+# Decoding is greedy (deterministic), so identical resumes always yield the same report.
+# Reports are memoized by the SHA-256 of the resume text, evicting least recently used.
+REPORT_CACHE_SIZE = 128
+report_cache = OrderedDict()
+report_cache_lock = threading.Lock()
+
+def get_cached_report(cache_key):
+    """
+    Returns the cached report for cache_key, or None if it hasn't been generated yet.
+    """
+    with report_cache_lock:
+        report = report_cache.get(cache_key)
+        if report is not None:
+            report_cache.move_to_end(cache_key)
+        return report
+
+def cache_report(cache_key, report):
+    """
+    Stores a generated report, evicting the least recently used entry when full.
+    """
+    with report_cache_lock:
+        report_cache[cache_key] = report
+        report_cache.move_to_end(cache_key)
+        if len(report_cache) > REPORT_CACHE_SIZE:
+            report_cache.popitem(last=False)
+
+def cpu_supports_amx():
+    """
+    Returns True if the CPU exposes AMX BF16 tile instructions (4th Gen Xeon and newer).
+    Plain BF16 is slower than FP32 on older CPUs, so BF16 is only used when AMX is present.
+    """
     try:
-        input_text = tokenizer.apply_chat_template(
-            messages,
-            tokenize=False,
-            add_generation_prompt=True
+        with open("/proc/cpuinfo") as f:
+            return "amx_bf16" in f.read()
+    except OSError:
+        return False
+
+def load_llama_model():
+    """
+    Loads the LLaMA 3.1 model and tokenizer for CPU inference.
+    This function will be called once when the Quart app starts.
+    Uses the llama.cpp GGUF backend when available, otherwise the Hugging Face model,
+    which requires the HUGGING_FACE_HUB_TOKEN environment variable to be set.
+    """
+    global tokenizer, model, draft_model, llm, model_loaded, model_precision
+    if model_loaded:
+        print("Model already loaded.")
+        return
+
+    print(f"Loading LLaMA 3.1 model for CPU: {LLAMA_MODEL_ID}...")
+    # Use every core for intra-op parallelism (the matmuls); decoding is sequential, so
+    # inter-op parallelism only adds thread contention. A preloading gunicorn master loads
+    # on one thread, so no OpenMP thread pool exists yet when it forks the workers.
+    load_threads = 1 if PRELOAD_FOR_FORK else os.cpu_count()
+    torch.set_num_threads(load_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError as e:
+        # Can only be set once, before any inter-op parallel work has started
+        print(f"Warning: could not set inter-op threads: {e}")
+
+    try:
+        if LLAMA_CPP_AVAILABLE and os.path.isfile(LLAMA_GGUF_PATH):
+            print(f"Using llama.cpp backend with {LLAMA_GGUF_PATH}")
+            # n_batch controls how many prompt tokens are prefilled per forward pass
+            llm = Llama(
+                model_path=LLAMA_GGUF_PATH,
+                n_threads=load_threads,
+                n_ctx=4096,
+                n_batch=512,
+                verbose=False
+            )
+            model_precision = "gguf"
+        else:
+            # Check for Hugging Face token
+            hf_token = os.environ.get("HUGGING_FACE_HUB_TOKEN")
+            if not hf_token:
+                raise ValueError("HUGGING_FACE_HUB_TOKEN environment variable not set. Please set it.")
+
+            tokenizer = AutoTokenizer.from_pretrained(LLAMA_MODEL_ID, token=hf_token)
+            tokenize_prompt_template()
+            if ITREX_AVAILABLE:
+                # INT4 weight-only quantization (group-wise, INT8 compute) dispatches the Linear
+                # layers to fused dequant+GEMM CPU kernels (AVX512_VNNI / AMX when available)
+                quantization_config = INT4QuantConfig(
+                    compute_dtype="int8",
+                    weight_dtype="int4_clip",
+                    group_size=128
+                )
+                model = INT4AutoModelForCausalLM.from_pretrained(
+                    LLAMA_MODEL_ID,
+                    load_in_4bit=True,
+                    quantization_config=quantization_config,
+                    low_cpu_mem_usage=True,
+                    token=hf_token,
+                    # Keep a regular transformers module: compile, prefix caching, stopping
+                    # criteria and streaming all need one
+                    **{ITREX_RUNTIME_FLAG: False}
+                )
+                if isinstance(model, torch.nn.Module):
+                    model_precision = "int4"
+                else:
+                    print(f"Warning: ITREX returned {type(model).__name__}, not a torch module; loading full-precision weights.")
+                    model = None
+            else:
+                print("intel-extension-for-transformers not installed, loading full-precision weights.")
+
+            if model is None:
+                try:
+                    model = AutoModelForCausalLM.from_pretrained(
+                        LLAMA_MODEL_ID,
+                        # No torch_dtype=torch.bfloat16 or device_map="auto" for CPU
+                        low_cpu_mem_usage=True, # Still useful for reducing CPU RAM during loading
+                        # PyTorch's fused scaled-dot-product attention tiles softmax and matmul
+                        # instead of materializing the full attention matrix
+                        attn_implementation="sdpa",
+                        token=hf_token
+                    ).to(DEVICE) # Explicitly move model to CPU after loading
+                except (ValueError, ImportError) as e:
+                    # Raised when the installed torch/transformers can't dispatch Llama to SDPA
+                    print(f"Warning: SDPA attention unavailable, using eager attention: {e}")
+                    model = AutoModelForCausalLM.from_pretrained(
+                        LLAMA_MODEL_ID,
+                        low_cpu_mem_usage=True,
+                        attn_implementation="eager",
+                        token=hf_token
+                    ).to(DEVICE)
+                print(f"Attention implementation: {model.config._attn_implementation}")
+
+            model.eval() # Set model to evaluation mode
+
+            if model_precision == "fp32" and IPEX_AVAILABLE and cpu_supports_amx():
+                # IPEX's graph-rewritten Llama routes BF16 matmuls to AMX
+                try:
+                    model = ipex.llm.optimize(model, dtype=torch.bfloat16, inplace=True)
+                    model_precision = "bf16"
+                except Exception as e:
+                    print(f"Warning: IPEX optimization failed, keeping FP32 weights: {e}")
+
+            if model_precision == "fp32":
+                # Dynamic INT8 quantization of every nn.Linear cuts weight bandwidth ~4x in the
+                # memory-bound decode loop; keep FP32 on CPUs without a quantized backend
+                try:
+                    model = torch.ao.quantization.quantize_dynamic(
+                        model, {torch.nn.Linear}, dtype=torch.qint8
+                    )
+                    model_precision = "int8"
+                except Exception as e:
+                    print(f"Warning: dynamic INT8 quantization unavailable, keeping FP32 weights: {e}")
+
+            # IPEX's optimized Llama keeps its own KV-cache layout, which assisted decoding and
+            # torch.compile don't support, so both are only used on the other paths
+            if LLAMA_DRAFT_MODEL_ID and model_precision != "bf16":
+                draft_model = load_draft_model(hf_token)
+
+        model_loaded = True
+        print(f"LLaMA 3.1 model loaded successfully on {DEVICE} ({model_precision} weights).")
+    except Exception as e:
+        print(f"Error loading LLaMA model: {e}")
+        # Exit or raise error, as the app won't function without the model
+        exit(1)
+
+def prepare_model(n_threads=None):
+    """
+    Runs the loaded model's first forward passes: the prompt prefix prefill, torch.compile
+    priming and the warm-up generation. Called once in every process that serves requests,
+    i.e. in each gunicorn worker after the fork when the app is preloaded, since torch's
+    OpenMP thread pool and inductor's compile workers don't survive a fork.
+    """
+    set_inference_threads(n_threads or os.cpu_count())
+    warmed_up = False
+    try:
+        # IPEX's optimized Llama manages its own KV cache, so prefix caching is skipped there.
+        # Prefilled before compiling so the warm-up below starts from the cached prefix too.
+        if llm is None and model_precision != "bf16":
+            prefill_prompt_prefix()
+
+            # Compile the forward pass to fuse ops and drop per-layer Python dispatch overhead
+            eager_forward = model.forward
+            try:
+                model.forward = torch.compile(model.forward, mode="reduce-overhead", fullgraph=False)
+                # Prime the compile cache for the request-tail prefill, cached decode steps and
+                # drafted verification steps, so the first real request doesn't pay for them
+                warm_up_model()
+                warmed_up = True
+            except Exception as e:
+                print(f"Warning: torch.compile failed, using eager forward pass: {e}")
+                model.forward = eager_forward
+
+        # Initialize lazy kernels (oneDNN primitives, SDPA, llama.cpp buffers) before the
+        # first request
+        if not warmed_up:
+            warm_up_model()
+    except Exception as e:
+        print(f"Error preparing LLaMA model: {e}")
+        exit(1)
+
+# Short resume for the warm-up; it shares words with the prompt so prompt-lookup drafts
+WARMUP_RESUME_TEXT = "Software Engineer at Acme Corp. Skills: Python, SQL, problem-solving, communication."
+# Enough new tokens to run several cached single-token decode steps and a drafted
+# (multi-token) verification step after the prefill, not just the prefill itself
+WARMUP_NEW_TOKENS = 16
+
+def warm_up_model():
+    """
+    Runs a short generation with the loaded backend, through the same prefix cache and
+    drafting setup as a real request.
+    """
+    if llm is not None:
+        llm(WARMUP_RESUME_TEXT, max_tokens=WARMUP_NEW_TOKENS)
+        return
+
+    with torch.inference_mode(), torch.autocast(device_type=DEVICE, dtype=torch.bfloat16, enabled=model_precision == "bf16"):
+        model.generate(
+            **build_generate_kwargs(WARMUP_RESUME_TEXT),
+            max_new_tokens=WARMUP_NEW_TOKENS
         )
 
-        # Tokenize the input text and ensure it's on the specified DEVICE (CPU)
-        model_inputs = tokenizer(input_text, return_tensors="pt").to(DEVICE)
-
-        generated_ids = model.generate(
-            **model_inputs,
-            max_new_tokens=700,
-            do_sample=True,
-            temperature=0.4,
-            top_p=0.9,
-            num_return_sequences=1,
-            pad_token_id=tokenizer.eos_token_id
+def set_inference_threads(n_threads):
+    """
+    Sets how many CPU threads the loaded backend decodes with, e.g. to split the cores
+    between gunicorn workers that share one preloaded model.
+    """
+    torch.set_num_threads(n_threads)
+    if llm is not None:
+        llm.n_threads = n_threads
+        llm.n_threads_batch = n_threads
+        llm.context_params.n_threads = n_threads
+        llm.context_params.n_threads_batch = n_threads
+        # The context was created with the old counts; update the live one too
+        llama_set_n_threads(llm.ctx, n_threads, n_threads)
+
+def load_draft_model(hf_token):
+    """
+    Loads the speculative decoding draft model, INT8-quantized like the main model.
+    Returns None if its vocabulary doesn't match the main tokenizer, since the main
+    model can only verify draft tokens that use the same token IDs.
+    """
+    print(f"Loading draft model for speculative decoding: {LLAMA_DRAFT_MODEL_ID}...")
+    try:
+        draft_tokenizer = AutoTokenizer.from_pretrained(LLAMA_DRAFT_MODEL_ID, token=hf_token)
+        if draft_tokenizer.get_vocab() != tokenizer.get_vocab():
+            print("Warning: draft model tokenizer differs from LLaMA 3.1, using prompt-lookup decoding instead.")
+            return None
+
+        draft = AutoModelForCausalLM.from_pretrained(
+            LLAMA_DRAFT_MODEL_ID,
+            low_cpu_mem_usage=True,
+            token=hf_token
+        ).to(DEVICE)
+        draft.eval()
+        try:
+            draft = torch.ao.quantization.quantize_dynamic(
+                draft, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        except Exception as e:
+            print(f"Warning: dynamic INT8 quantization unavailable for draft model: {e}")
+        return draft
+    except Exception as e:
+        print(f"Warning: could not load draft model, using prompt-lookup decoding instead: {e}")
+        return None
+
+# --- DOCX Parsing ---
+WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+WORD_PARAGRAPH = f"{WORD_NS}p"
+WORD_RUN = f"{WORD_NS}r"
+WORD_TEXT = f"{WORD_NS}t"
+WORD_TAB = f"{WORD_NS}tab"
+WORD_BREAK = f"{WORD_NS}br"
+WORD_CARRIAGE_RETURN = f"{WORD_NS}cr"
+WORD_BREAK_TYPE = f"{WORD_NS}type"
+# Text boxes are stored twice (mc:Choice and a legacy mc:Fallback copy); only read the first
+MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+
+def read_docx_from_bytes(docx_bytes):
+    """
+    Reads text from a .docx file provided as bytes.
+    Streams word/document.xml and joins the text of each paragraph's runs directly,
+    instead of building the full python-docx object graph. Tabs and line breaks inside
+    runs become "\t" and "\n", as in python-docx's paragraph.text.
+    """
+    try:
+        paragraphs = []
+        current_paragraph = []
+        fallback_depth = 0
+        with zipfile.ZipFile(io.BytesIO(docx_bytes)) as docx_zip, docx_zip.open("word/document.xml") as document_xml:
+            for event, element in etree.iterparse(
+                document_xml,
+                events=("start", "end"),
+                tag=(WORD_PARAGRAPH, WORD_TEXT, WORD_TAB, WORD_BREAK, WORD_CARRIAGE_RETURN, MC_FALLBACK),
+                resolve_entities=False
+            ):
+                if element.tag == MC_FALLBACK:
+                    fallback_depth += 1 if event == "start" else -1
+                elif event == "end" and fallback_depth == 0:
+                    if element.tag == WORD_TEXT:
+                        if element.text:
+                            current_paragraph.append(element.text)
+                    elif element.tag != WORD_PARAGRAPH:
+                        # w:tab also defines tab stops in paragraph properties; only run
+                        # children are content
+                        if element.getparent().tag != WORD_RUN:
+                            continue
+                        if element.tag == WORD_TAB:
+                            current_paragraph.append("\t")
+                        elif element.tag == WORD_CARRIAGE_RETURN or element.get(WORD_BREAK_TYPE, "textWrapping") == "textWrapping":
+                            # Page and column breaks carry no text
+                            current_paragraph.append("\n")
+                    else:
+                        paragraphs.append("".join(current_paragraph))
+                        current_paragraph = []
+                        # Drop already-processed elements to keep memory bounded
+                        element.clear()
+                        while element.getprevious() is not None:
+                            del element.getparent()[0]
+        return "\n".join(paragraphs)
+    except Exception as e:
+        print(f"Error reading DOCX: {e}")
+        raise ValueError("Could not read DOCX file.")
+
+def stream_gguf_report(resume_text, text_chunks, cancel_event):
+    """
+    Generates the report with llama.cpp, putting each new piece of text on text_chunks
+    and None once generation has finished, failed or been cancelled.
+    """
+    stream = None
+    try:
+        if cancel_event.is_set():
+            return
+        # llama.cpp applies the Llama 3 chat template stored in the GGUF metadata.
+        # Its stop= option can't wait for the Skills heading, so stop strings are checked
+        # here instead; closing the stream ends llama.cpp's generation.
+        stream = llm.create_chat_completion(
+            messages=build_messages(resume_text),
+            max_tokens=REPORT_MAX_NEW_TOKENS,
+            temperature=0.0, # Greedy decoding, matching the transformers path
+            stream=True
         )
-        
-        generated_report = tokenizer.batch_decode(generated_ids[:, model_inputs["input_ids"].shape[1]:], skip_special_tokens=True)[0]
-        generated_report = generated_report.replace(tokenizer.eos_token, "").strip()
+        report = ""
+        for chunk in stream:
+            new_text = chunk["choices"][0]["delta"].get("content", "")
+            text_chunks.put(new_text)
+            report += new_text
+            if cancel_event.is_set() or find_stop_index(report) != -1:
+                break
+    finally:
+        if stream is not None:
+            stream.close()
+        text_chunks.put(None)
+
+def build_generate_kwargs(resume_text):
+    """
+    Returns the model.generate arguments for resume_text shared by requests and the
+    warm-up, so both run the same prefill, decode and drafting code paths.
+    Must be called under torch.inference_mode, like the generate call itself.
+    """
+    # Only the resume and closing instructions are tokenized per request
+    input_ids = build_input_ids(resume_text)
+    generate_kwargs = {
+        "input_ids": input_ids,
+        "attention_mask": torch.ones_like(input_ids),
+        # Greedy decoding: no per-step sampling overhead and deterministic output
+        "do_sample": False,
+        "num_beams": 1,
+        "use_cache": True,
+        "pad_token_id": tokenizer.eos_token_id
+    }
+
+    if model_precision == "bf16":
+        # See load_llama_model: IPEX's KV-cache layout doesn't support candidate drafting
+        pass
+    elif draft_model is not None:
+        # Speculative decoding: the draft proposes tokens, the 8B model verifies them in one pass
+        generate_kwargs.update(assistant_model=draft_model, num_assistant_tokens=5)
+    else:
+        # Prompt-lookup decoding drafts tokens from n-grams in the prompt, no draft model needed.
+        # Reports quote the resume heavily (skills, companies), so matches are frequent.
+        generate_kwargs.update(prompt_lookup_num_tokens=10, max_matching_ngram_size=3)
+
+    if prompt_prefix_cache is not None:
+        # Start from the prefilled prefix: generate only runs the uncached tail of
+        # input_ids. Copied because generate appends to the cache in place.
+        generate_kwargs["past_key_values"] = copy.deepcopy(prompt_prefix_cache)
+    return generate_kwargs
+
+def stream_hf_report(resume_text, streamer, cancel_event):
+    """
+    Generates the report with the transformers model, pushing decoded text to streamer.
+    """
+    try:
+        if cancel_event.is_set():
+            # Cancelled while queued behind another request: skip the prefill entirely
+            streamer.end()
+            return
+
+        # inference_mode skips autograd bookkeeping (version counters, view tracking) per op.
+        # Run in BF16 autocast when the model was optimized by IPEX for AMX.
+        with torch.inference_mode(), torch.autocast(device_type=DEVICE, dtype=torch.bfloat16, enabled=model_precision == "bf16"):
+            generate_kwargs = build_generate_kwargs(resume_text)
+            prompt_length = generate_kwargs["input_ids"].shape[1]
+            model.generate(
+                **generate_kwargs,
+                streamer=streamer,
+                max_new_tokens=REPORT_MAX_NEW_TOKENS,
+                stopping_criteria=StoppingCriteriaList([
+                    StopOnSubstring(tokenizer, prompt_length),
+                    StopOnEvent(cancel_event)
+                ])
+            )
+    except Exception:
+        # Unblock the consumer, which would otherwise wait on the streamer forever
+        streamer.end()
+        raise
 
-        return generated_report
+def generate_llama_report(resume_text, cancel_event):
+    """
+    Generates a bias-free HR report using the loaded LLaMA 3.1 model, yielding the text
+    as it is produced. The model runs on generation_executor and this generator only waits
+    for its output, so it must be consumed from another thread.
+    Setting cancel_event stops the generation early; the partial report isn't cached.
+    """
+    if not model_loaded:
+        raise RuntimeError("LLaMA model not loaded.")
+
+    # Duplicate uploads short-circuit the whole decode
+    cache_key = hashlib.sha256(resume_text.encode("utf-8")).hexdigest()
+    cached_report = get_cached_report(cache_key)
+    if cached_report is not None:
+        yield cached_report
+        return
+
+    try:
+        if llm is not None:
+            text_chunks = queue.Queue()
+            generation = generation_executor.submit(stream_gguf_report, resume_text, text_chunks, cancel_event)
+            new_texts = iter(text_chunks.get, None)
+        else:
+            streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+            generation = generation_executor.submit(stream_hf_report, resume_text, streamer, cancel_event)
+            new_texts = streamer
+
+        generated_report = ""
+        streamed_length = 0
+        for new_text in new_texts:
+            generated_report = (generated_report + new_text).lstrip()
+            # Never send a stop marker (or the start of one) to the client
+            stream_end = streamable_length(generated_report)
+            if stream_end > streamed_length:
+                yield generated_report[streamed_length:stream_end]
+                streamed_length = stream_end
+        generation.result() # Re-raises any error from the generation worker
+        if cancel_event.is_set():
+            return
+
+        generated_report = trim_at_stop_strings(generated_report).strip()
+        if len(generated_report) > streamed_length:
+            yield generated_report[streamed_length:]
+
+        cache_report(cache_key, generated_report)
     except Exception as e:
         print(f"Error during LLaMA generation: {e}")
         raise RuntimeError(f"Failed to generate report: {e}")
 
+def format_sse(payload, event=None):
+    """
+    Formats payload as a Server-Sent Events message, JSON-encoded so newlines in the
+    report don't break the event framing.
+    """
+    message = f"data: {json.dumps(payload)}\n\n"
+    if event:
+        message = f"event: {event}\n" + message
+    return message
+
 # --- API Endpoint ---
 @app.route('/process_resume', methods=['POST'])
-def process_resume():
+async def process_resume():
     if not request.is_json:
         return jsonify({"error": "Request must be JSON"}), 400
 
-    data = request.get_json()
+    data = await request.get_json()
     base64_file_content = data.get('fileContent')
     file_name = data.get('fileName')
 
@@ -154,12 +716,21 @@ def process_resume():
     if not file_name.endswith('.docx'):
         return jsonify({"error": "Only .docx files are supported"}), 400
 
+    loop = asyncio.get_running_loop()
     try:
         docx_bytes = base64.b64decode(base64_file_content)
         raw_resume_text = read_docx_from_bytes(docx_bytes)
-        final_report = generate_llama_report(raw_resume_text)
-        return jsonify({"report": final_report}), 200
+        # Set when the client goes away, so the single generation worker isn't kept busy
+        # by a report nobody will read
+        cancel_event = threading.Event()
+        report_chunks = generate_llama_report(raw_resume_text, cancel_event)
+        # Wait for the first chunk (i.e. the prefill) so errors before any output is
+        # produced are still reported with a proper status code
+        first_chunk = await loop.run_in_executor(None, next, report_chunks, None)
 
+    except asyncio.CancelledError:
+        cancel_event.set()
+        raise
     except ValueError as ve:
         return jsonify({"error": str(ve)}), 400
     except RuntimeError as re:
@@ -168,9 +739,45 @@ def process_resume():
         print(f"Unhandled error: {e}")
         return jsonify({"error": "An unexpected error occurred on the server."}), 500
 
+    async def stream_report():
+        chunk = first_chunk
+        try:
+            while chunk is not None:
+                yield format_sse({"text": chunk})
+                chunk = await loop.run_in_executor(None, next, report_chunks, None)
+            yield format_sse({}, event="done")
+        except RuntimeError as re:
+            yield format_sse({"error": str(re)}, event="error")
+        except Exception as e:
+            print(f"Unhandled error: {e}")
+            yield format_sse({"error": "An unexpected error occurred on the server."}, event="error")
+        finally:
+            # Runs on completion and when the client disconnects (the generator is cancelled)
+            cancel_event.set()
+            try:
+                report_chunks.close()
+            except ValueError:
+                # next() is still running in an executor thread; it returns once the
+                # generation worker sees the cancelled event
+                pass
+
+    response = Response(
+        stream_report(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+    # Generation can outlast Quart's default response timeout
+    response.timeout = None
+    return response
+
 # --- App Initialization ---
+# Load the model at import time, so with gunicorn's preload_app (see gunicorn_conf.py) it is
+# loaded once in the master and forked workers share the weights copy-on-write. The master
+# then runs no forward pass; each worker calls prepare_model() itself after the fork.
+load_llama_model()
+if not PRELOAD_FOR_FORK:
+    prepare_model()
+
 if __name__ == '__main__':
-    # Load the model when the application starts
-    load_llama_model()
-    # Run the Flask app
+    # Run the Quart app
     app.run(host='0.0.0.0', port=5000, debug=False)
\ No newline at end of file
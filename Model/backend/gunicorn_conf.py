@@ -0,0 +1,29 @@
+# backend/gunicorn_conf.py
+# Run with: gunicorn -c gunicorn_conf.py app:app
+import os
+
+bind = "0.0.0.0:5000"
+
+# Import app.py (which loads the LLaMA model) once in the master process; forked workers
+# share the model weights copy-on-write instead of each loading their own ~16 GB copy
+preload_app = True
+# Tells app.py it is being preloaded: the master only loads weights, single-threaded, and runs
+# no forward pass, since OpenMP thread pools (GNU libgomp) and inductor's compile workers
+# don't survive a fork. Each worker warms up and compiles the model in post_worker_init.
+os.environ["FAIRHIRE_PRELOAD_FOR_FORK"] = "1"
+# Note: each worker is a separate process with its own generation_executor and report_cache,
+# so with 2 workers two reports can decode at once (on half the cores each, see
+# post_worker_init) and a resume cached by one worker is regenerated by the other. Set
+# workers = 1 to keep app.py's single-generation-worker guarantee and one shared report cache.
+workers = 2
+# Quart is an ASGI app, so workers run it under uvicorn rather than gthread/sync workers
+worker_class = "uvicorn.workers.UvicornWorker"
+# CPU generation of a full report can take well over gunicorn's default 30 s, and each
+# worker's warm-up and compilation runs before its first heartbeat
+timeout = 600
+
+def post_worker_init(worker):
+    # Split the cores between workers to avoid oversubscription, then run the model's first
+    # forward passes (prefix prefill, torch.compile priming, warm-up) in this worker
+    from app import prepare_model
+    prepare_model(max(1, os.cpu_count() // workers))
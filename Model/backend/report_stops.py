@@ -0,0 +1,115 @@
+# backend/report_stops.py
+# Decides where a generated report should end. Kept free of torch/transformers so the
+# rules can be tested on plain strings.
+import re
+
+# Markers that end the report when the model starts appending a new section after it
+REPORT_STOP_STRINGS = ["\n\n###", "\n---"]
+# The markers are also the usual separators between report sections, so they only end the
+# report once its last section, "Skills", has started
+SKILLS_HEADING_RE = re.compile(r"^[ \t#*>\d.]*(?:[\w ]+ )?Skills[ \t*:]*$", re.IGNORECASE | re.MULTILINE)
+
+# Outcomes of checking one marker occurrence
+STOP = "stop"
+NOT_STOP = "not_stop"
+UNDECIDED = "undecided" # The text that decides it hasn't been generated yet
+
+def skills_heading_end(report):
+    """
+    Returns the index just past the report's Skills heading, or None if it hasn't one yet.
+    """
+    heading = SKILLS_HEADING_RE.search(report)
+    return heading.end() if heading else None
+
+def next_nonblank_line(text, start, final):
+    """
+    Returns the first non-blank line of text at or after start. Returns None if that line
+    isn't complete yet, unless the text is final, in which case "" means nothing follows.
+    """
+    line_start = start
+    while True:
+        line_end = text.find("\n", line_start)
+        if line_end == -1:
+            return text[line_start:] if final else None
+        line = text[line_start:line_end]
+        if line.strip():
+            return line
+        line_start = line_end + 1
+
+def classify_marker(report, marker_index, stop, final):
+    """
+    Decides whether the stop string at marker_index ends the report. Sub-headings ("####")
+    and further Skills headings (e.g. "### Soft Skills" or a "---" rule followed by one)
+    continue the Skills section rather than ending it.
+    """
+    after = marker_index + len(stop)
+    if stop.endswith("#"):
+        if after == len(report) and not final:
+            return UNDECIDED
+        if report.startswith("#", after):
+            return NOT_STOP
+        following_line = next_nonblank_line(report, after, final)
+    else:
+        # Skip the rest of the rule line, then look at the next line of content
+        rule_end = report.find("\n", after)
+        if rule_end == -1:
+            return STOP if final else UNDECIDED
+        following_line = next_nonblank_line(report, rule_end + 1, final)
+
+    if following_line is None:
+        return UNDECIDED
+    return NOT_STOP if "skill" in following_line.lower() else STOP
+
+def scan_stop_markers(report, final):
+    """
+    Returns (outcome, index) for the first marker after the Skills heading that isn't
+    NOT_STOP, or (None, -1) if there is none. While generating, a trailing partial marker
+    counts as UNDECIDED.
+    """
+    heading_end = skills_heading_end(report)
+    if heading_end is None:
+        return None, -1
+
+    candidates = []
+    for stop in REPORT_STOP_STRINGS:
+        marker_index = report.find(stop, heading_end)
+        while marker_index != -1:
+            candidates.append((marker_index, stop))
+            marker_index = report.find(stop, marker_index + 1)
+    for marker_index, stop in sorted(candidates):
+        outcome = classify_marker(report, marker_index, stop, final)
+        if outcome != NOT_STOP:
+            return outcome, marker_index
+
+    if not final:
+        partial_starts = [
+            len(report) - length
+            for stop in REPORT_STOP_STRINGS for length in range(1, len(stop))
+            if report.endswith(stop[:length]) and len(report) - length >= heading_end
+        ]
+        if partial_starts:
+            return UNDECIDED, min(partial_starts)
+    return None, -1
+
+def find_stop_index(report, final=False):
+    """
+    Returns the index where the report ends at a stop marker, or -1 if it doesn't (yet).
+    Pass final=True once generation has finished, so a marker at the very end is decided.
+    """
+    outcome, marker_index = scan_stop_markers(report, final)
+    return marker_index if outcome == STOP else -1
+
+def trim_at_stop_strings(report):
+    """
+    Cuts a finished report at its stop marker, if it has one.
+    """
+    stop_index = find_stop_index(report, final=True)
+    return report[:stop_index] if stop_index != -1 else report
+
+def streamable_length(report):
+    """
+    Returns how many characters of a partial report are safe to send to the client: the
+    text before a stop marker, holding back markers that may still turn out to be one.
+    """
+    outcome, marker_index = scan_stop_markers(report, final=False)
+    return marker_index if outcome is not None else len(report)
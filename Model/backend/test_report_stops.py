@@ -0,0 +1,54 @@
+# backend/test_report_stops.py
+from report_stops import find_stop_index, streamable_length, trim_at_stop_strings
+
+REPORT = "### Qualifications\n- BSc CS\n\n### Experience\n- Acme\n\n### Skills\n- Python"
+
+
+def test_separators_before_skills_are_kept():
+    assert trim_at_stop_strings(REPORT) == REPORT
+    ruled = "Qualifications\n---\n- BSc\n---\nExperience\n- Acme\n---\nSkills:\n- Python"
+    assert trim_at_stop_strings(ruled) == ruled
+
+
+def test_skills_sub_headings_are_kept():
+    report = "### Skills\n\n#### Technical Skills\n- Python\n\n#### Soft Skills\n- Teamwork"
+    assert trim_at_stop_strings(report) == report
+
+
+def test_further_skills_headings_are_kept():
+    report = "### Technical Skills\n- Python\n\n### Professional Skills\n- Communication"
+    assert trim_at_stop_strings(report) == report
+    ruled = "### Skills\n- Python\n---\n\n**Soft Skills**\n- Teamwork"
+    assert trim_at_stop_strings(ruled) == ruled
+
+
+def test_new_section_after_skills_is_cut():
+    assert trim_at_stop_strings(REPORT + "\n\n### Notes\nCandidate seems great") == REPORT
+    assert trim_at_stop_strings(REPORT + "\n---\nNote: generated by AI") == REPORT
+
+
+def test_marker_at_end_of_finished_report_is_cut():
+    assert trim_at_stop_strings(REPORT + "\n\n### Notes") == REPORT
+    assert trim_at_stop_strings(REPORT + "\n---") == REPORT
+
+
+def test_stop_waits_for_the_deciding_line():
+    # "### Soft" may still become "### Soft Skills"
+    assert find_stop_index(REPORT + "\n\n### Soft") == -1
+    assert find_stop_index(REPORT + "\n\n### Soft Skills\n") == -1
+    assert find_stop_index(REPORT + "\n\n### Notes\n") == len(REPORT)
+    assert find_stop_index(REPORT + "\n---\n") == -1
+    assert find_stop_index(REPORT + "\n---\nNote\n") == len(REPORT)
+
+
+def test_streamable_length_holds_back_possible_markers():
+    assert streamable_length(REPORT) == len(REPORT)
+    # Partial and undecided markers after the Skills heading are held back
+    assert streamable_length(REPORT + "\n\n#") == len(REPORT)
+    assert streamable_length(REPORT + "\n\n### Soft") == len(REPORT)
+    assert streamable_length(REPORT + "\n\n### Notes\nmore") == len(REPORT)
+    # Once a marker turns out to continue the Skills section it is released
+    continued = REPORT + "\n\n#### Soft Skills\n- Teamwork"
+    assert streamable_length(continued) == len(continued)
+    # Before the Skills heading nothing is held back
+    assert streamable_length("### Qualifications\n- BSc\n\n#") == len("### Qualifications\n- BSc\n\n#")
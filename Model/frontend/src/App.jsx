@@ -33,14 +33,46 @@ export default function App() {
           headers: { 'Content-Type': 'application/json' },
           body: JSON.stringify(payload)
         });
-        const result = await response.json();
-        if (response.ok) {
-          setReport(result.report);
-          setMessage('Report generated successfully by LLaMA 3.1!');
-        } else {
+        if (!response.ok) {
+          const result = await response.json();
           console.error('Backend error:', result.error);
           setMessage(`Error: ${result.error || 'Failed to process resume.'}`);
           setReport('');
+          return;
+        }
+        // The report is streamed as Server-Sent Events: "data" messages carry the next
+        // piece of text, then a "done" or "error" event ends the stream
+        const streamReader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let reportText = '';
+        while (true) {
+          const { done, value } = await streamReader.read();
+          if (done) break;
+          buffer += decoder.decode(value, { stream: true });
+          const events = buffer.split('\n\n');
+          buffer = events.pop();
+          for (const rawEvent of events) {
+            let eventName = 'message';
+            let data = '';
+            for (const line of rawEvent.split('\n')) {
+              if (line.startsWith('event: ')) eventName = line.slice(7);
+              else if (line.startsWith('data: ')) data += line.slice(6);
+            }
+            const payload = JSON.parse(data || '{}');
+            if (eventName === 'error') {
+              console.error('Backend error:', payload.error);
+              setMessage(`Error: ${payload.error || 'Failed to process resume.'}`);
+              setReport('');
+              return;
+            }
+            if (eventName === 'done') {
+              setMessage('Report generated successfully by LLaMA 3.1!');
+            } else {
+              reportText += payload.text;
+              setReport(reportText);
+            }
+          }
         }
       };
       reader.readAsArrayBuffer(file);